@@ -1,18 +1,32 @@
 import os
+import sys
+import asyncio
+import functools
+import threading
 from dotenv import load_dotenv
-from typing import Any, Callable, Set
+from prompt_toolkit import PromptSession
+from prompt_toolkit.patch_stdout import patch_stdout
+from typing import Any, Callable, Optional, Set
 from azure.identity import DefaultAzureCredential
 from azure.ai.agents import AgentsClient
-from azure.ai.agents.models import FunctionTool, ToolSet, MessageRole, ListSortOrder
+from azure.ai.agents.models import (
+    FunctionTool,
+    ToolSet,
+    MessageRole,
+    ListSortOrder,
+    AgentStreamEvent,
+    MessageDeltaChunk,
+    ThreadRun,
+)
 
 from src.database import Database
-from src.sql_tool import execute_sql_function
+from src.sql_tool import execute_sql_function, execute_sql_batch
 
 
+@functools.lru_cache(maxsize=None)
 def system_message():
     """Initialize the system message with schema information."""
-    db = Database()
-    schema_info = db.get_schema_info()
+    schema_info = Database.get_schema_info()
 
     system_content = f"""You are a SQL expert agent specializing in Zero-Based Budgeting databases. 
 Your task is to help users query budget data by converting their natural language questions into SQL queries.
@@ -33,13 +47,80 @@ Guidelines:
 11. Use LIMIT instead of TOP for limiting results
 12. Use MySQL-specific syntax and functions
 
-When a user asks a question, use the execute_sql_query function to execute the SQL query and return the results.
+When a user asks a question, use the execute_sql_function function to execute the SQL query and return the results.
+Query results are returned in the "results_json" field as a JSON object with "columns" (column names) and "rows" (arrays of values in column order); DECIMAL amounts appear as strings.
+At most 200 rows are returned per query. When more rows match, "truncated_total" gives the full row count; aggregate in SQL or add ORDER BY and LIMIT instead of relying on the full row set.
+If answering requires several independent queries, pass them together to the execute_sql_batch function so they run concurrently.
 """
 
     return system_content
 
 
-def main():
+def warm_up_database():
+    """Fill the connection pool so the first question skips connect/auth."""
+    try:
+        with Database() as db:
+            db.execute_query("SELECT 1")
+    except Exception as e:
+        print(f"Database warm-up failed: {str(e)}")
+
+
+def run_prompt(
+    agent_client: AgentsClient, thread_id: str, agent_id: str, user_prompt: str
+):
+    """Post a user prompt to the thread and stream the agent's response."""
+    agent_client.messages.create(
+        thread_id=thread_id,
+        role=MessageRole.USER,
+        content=user_prompt,
+    )
+
+    # Stream the run, printing response text as it arrives
+    response_started = False
+    with agent_client.runs.stream(
+        thread_id=thread_id,
+        agent_id=agent_id,
+    ) as stream:
+        for event_type, event_data, _ in stream:
+            if isinstance(event_data, MessageDeltaChunk):
+                if not response_started:
+                    print("\n--- Agent Response ---")
+                    response_started = True
+                sys.stdout.write(event_data.text)
+                sys.stdout.flush()
+            elif isinstance(event_data, ThreadRun):
+                if event_data.status == "failed":
+                    print(f"Run failed: {event_data.last_error}")
+            elif event_type == AgentStreamEvent.ERROR:
+                print(f"Run failed: {event_data}")
+
+    if response_started:
+        print()
+
+
+async def process_prompts(
+    agent_client: AgentsClient,
+    thread_id: str,
+    agent_id: str,
+    prompts: "asyncio.Queue[Optional[str]]",
+):
+    """Run queued prompts one at a time until a None sentinel is received."""
+    while True:
+        user_prompt = await prompts.get()
+        try:
+            if user_prompt is None:
+                return
+            # The Agents client is synchronous, so keep it off the event loop
+            await asyncio.to_thread(
+                run_prompt, agent_client, thread_id, agent_id, user_prompt
+            )
+        except Exception as e:
+            print(f"Run failed: {str(e)}")
+        finally:
+            prompts.task_done()
+
+
+async def main():
 
     # Clear console
     os.system("cls" if os.name == "nt" else "clear")
@@ -62,7 +143,10 @@ def main():
     )
 
     # Define a set of callable functions
-    user_functions: Set[Callable[..., Any]] = {execute_sql_function}
+    user_functions: Set[Callable[..., Any]] = {
+        execute_sql_function,
+        execute_sql_batch,
+    }
 
     with agent_client:
 
@@ -81,6 +165,9 @@ def main():
             toolset=toolset,
         )
 
+        # Connect to MySQL in the background while the session starts up
+        threading.Thread(target=warm_up_database, daemon=True).start()
+
         # Create a conversation thread
         thread = agent_client.threads.create()
         print(f"Agent ready: {agent.name} ({agent.id})")
@@ -88,50 +175,47 @@ def main():
         # -----------------------------
         # Interactive chat loop
         # -----------------------------
-        while True:
-            user_prompt = input(
-                "\nAsk a variance question (or type 'quit', 'exit', or 'q'): "
-            )
-            if user_prompt.lower() in ["quit", "exit", "q"]:
-                break
-            if not user_prompt.strip():
-                continue
-
-            agent_client.messages.create(
-                thread_id=thread.id,
-                role=MessageRole.USER,
-                content=user_prompt,
-            )
-
-            run = agent_client.runs.create_and_process(
-                thread_id=thread.id,
-                agent_id=agent.id,
-            )
+        # Prompts are queued so the next question can be typed while the
+        # current run is still streaming; runs on a thread are sequential.
+        prompts: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        runner = asyncio.create_task(
+            process_prompts(agent_client, thread.id, agent.id, prompts)
+        )
+        session = PromptSession()
 
-            if run.status == "failed":
-                print(f"Run failed: {run.last_error}")
-                continue
+        with patch_stdout():
+            while True:
+                user_prompt = await session.prompt_async(
+                    "\nAsk a variance question (or type 'quit', 'exit', or 'q'): "
+                )
+                if user_prompt.lower() in ["quit", "exit", "q"]:
+                    break
+                if not user_prompt.strip():
+                    continue
 
-            response = agent_client.messages.get_last_message_text_by_role(
-                thread_id=thread.id,
-                role=MessageRole.AGENT,
-            )
+                await prompts.put(user_prompt)
 
-            if response:
-                print("\n--- Agent Response ---")
-                print(response.text.value)
+            # Let any queued runs finish before leaving the chat loop
+            await prompts.put(None)
+            await runner
 
         # -----------------------------
         # Conversation log (optional)
         # -----------------------------
         print("\nConversation History:\n")
         messages = agent_client.messages.list(
-            thread_id=thread.id, order=ListSortOrder.ASCENDING
+            thread_id=thread.id, order=ListSortOrder.ASCENDING, limit=50
         )
 
-        for msg in messages:
-            if msg.text_messages:
-                print(f"{msg.role}: {msg.text_messages[-1].text.value}\n")
+        # Print page by page as the server returns them; flush once at the end
+        for page in messages.by_page():
+            for msg in page:
+                if msg.text_messages:
+                    print(
+                        f"{msg.role}: {msg.text_messages[-1].text.value}\n",
+                        flush=False,
+                    )
+        sys.stdout.flush()
 
         # Cleanup (optional)
         agent_client.delete_agent(agent.id)
@@ -139,4 +223,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -1,56 +1,342 @@
 """Database connection and query execution utilities."""
 
 import os
+import hashlib
+import socket
+import threading
 import pymysql
+import pymysql.connections
 import pymysql.cursors
 from pymysql import Error
-from typing import List, Dict, Any, Optional
+from pymysql.constants import CLIENT, CR, ER
+from dbutils.pooled_db import PooledDB
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
 
 # load environment variables from .env file
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Process-wide connection pools, keyed on connection parameters
+_POOLS: Dict[tuple, PooledDB] = {}
+_POOLS_LOCK = threading.Lock()
+
+# Maximum number of server-side prepared statements kept per Database
+_PREPARED_CACHE_SIZE = 64
+# Number of recently run query texts remembered to spot repeats
+_SEEN_CACHE_SIZE = 256
+
+# TCP keepalive settings so idle pooled connections survive NATs/load balancers
+_KEEPALIVE_IDLE = 60
+_KEEPALIVE_INTERVAL = 10
+_KEEPALIVE_COUNT = 3
+
+
+class _KeepaliveConnection(pymysql.connections.Connection):
+    """PyMySQL connection that enables TCP keepalive on every (re)connect."""
+
+    def connect(self, sock=None):
+        """Open the socket, then turn on TCP keepalive for it."""
+        super().connect(sock)
+        sock = self._sock
+        if sock is None or sock.family == getattr(socket, "AF_UNIX", None):
+            return
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        # Fine-grained keepalive timing is only available on some platforms
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, _KEEPALIVE_IDLE)
+            sock.setsockopt(
+                socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, _KEEPALIVE_INTERVAL
+            )
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, _KEEPALIVE_COUNT)
+
+
+def _connect(**params) -> pymysql.Connection:
+    """Create a keepalive-enabled PyMySQL connection for the pool."""
+    return _KeepaliveConnection(**params)
+
+
+# Lets DBUtils resolve the DB-API module (exceptions, threadsafety) for _connect
+_connect.dbapi = pymysql
+
+# Client errors that mean the connection itself is gone
+_CONNECTION_LOST_ERRORS = (
+    CR.CR_SERVER_GONE_ERROR,
+    CR.CR_SERVER_LOST,
+    CR.CR_SERVER_LOST_EXTENDED,
+)
+
+
+def _is_connection_lost(error: Exception) -> bool:
+    """
+    Tell DBUtils whether an error should trigger reconnect-and-retry.
+
+    PyMySQL raises OperationalError for most server errors (unknown column,
+    GROUP BY violations, read-only rejections, ...); retrying those on a new
+    connection only repeats the failing statement.
+    """
+    if isinstance(error, pymysql.InterfaceError):
+        return True
+    return bool(error.args) and error.args[0] in _CONNECTION_LOST_ERRORS
+
+
+def _get_pool(params: Dict[str, Any]) -> PooledDB:
+    """
+    Get (lazily creating) the shared connection pool for the given parameters.
+
+    Args:
+        params: Keyword arguments passed to pymysql.connect
+
+    Returns:
+        PooledDB instance shared by all Database objects with the same params
+    """
+    key = tuple(sorted(params.items()))
+    pool = _POOLS.get(key)
+    if pool is None:
+        with _POOLS_LOCK:
+            pool = _POOLS.get(key)
+            if pool is None:
+                pool = PooledDB(
+                    creator=_connect,
+                    mincached=2,
+                    maxcached=10,
+                    maxconnections=20,
+                    blocking=True,
+                    isfatal=_is_connection_lost,
+                    **params,
+                )
+                _POOLS[key] = pool
+    return pool
+
+
+@dataclass(frozen=True, slots=True)
+class MySQLConfig:
+    """MySQL connection settings loaded from environment variables."""
+
+    host: str
+    port: int
+    database: str
+    user: str
+    password: str
+    ssl_disabled: bool
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Get keyword arguments for pymysql.connect."""
+        return {
+            "host": self.host,
+            "port": self.port,
+            "database": self.database,
+            "user": self.user,
+            "password": self.password,
+            "autocommit": False,
+            "read_timeout": 30,
+            "write_timeout": 30,
+        }
+
+
+@lru_cache(maxsize=1)
+def _cfg() -> MySQLConfig:
+    """Get database configuration from environment variables (read once)."""
+    return MySQLConfig(
+        host=os.getenv("MYSQL_HOST", "localhost"),
+        port=int(os.getenv("MYSQL_PORT", "3306")),
+        database=os.getenv("MYSQL_DATABASE", "budget_db"),
+        user=os.getenv("MYSQL_USERNAME", "root"),
+        password=os.getenv("MYSQL_PASSWORD", ""),
+        ssl_disabled=os.getenv("MYSQL_SSL_DISABLED", "False").lower() == "true",
+    )
+
+
+# Static schema documentation used to ground NL to SQL conversion
+_SCHEMA_INFO = """
+Database Schema for Zero-Based Budgeting (MySQL):
+
+Table: departments
+Columns:
+- id (INT, PRIMARY KEY): Unique identifier for department
+- name (VARCHAR): Department name
+- code (VARCHAR): Department code (unique)
+- created_at (TIMESTAMP): Creation timestamp (auto-set on insert)
+
+Table: budget_periods
+Columns:
+- id (INT, PRIMARY KEY): Unique identifier for budget period
+- period_name (VARCHAR): Name of the period (e.g., "Q1 2024")
+- start_date (DATE): Period start date
+- end_date (DATE): Period end date
+- status (VARCHAR): Status (Draft, Approved, Closed)
+- created_at (TIMESTAMP): Creation timestamp (auto-set on insert)
+
+Table: budget_categories
+Columns:
+- id (INT, PRIMARY KEY): Unique identifier for category
+- category_name (VARCHAR): Category name
+- description (VARCHAR): Category description
+- created_at (TIMESTAMP): Creation timestamp (auto-set on insert)
+
+Table: budget_items
+Columns:
+- id (INT, PRIMARY KEY): Unique identifier for budget item
+- department_id (INT, FOREIGN KEY -> departments.id): Department reference
+- period_id (INT, FOREIGN KEY -> budget_periods.id): Budget period reference
+- category_id (INT, FOREIGN KEY -> budget_categories.id): Category reference
+- budgeted_amount (DECIMAL): Budgeted amount
+- justification (VARCHAR): Justification for the budget item
+- status (VARCHAR): Status (Draft, Submitted, Approved, Rejected)
+- created_at (TIMESTAMP): Creation timestamp (auto-set on insert)
+
+Table: actual_expenses
+Columns:
+- id (INT, PRIMARY KEY): Unique identifier for expense
+- budget_item_id (INT, FOREIGN KEY -> budget_items.id): Budget item reference
+- amount (DECIMAL): Expense amount
+- expense_date (DATE): Date of expense
+- description (VARCHAR): Expense description
+- created_at (TIMESTAMP): Creation timestamp (auto-set on insert)
+
+Common Query Patterns:
+- To get budget totals by department: JOIN budget_items with departments
+- To get budget by period: JOIN budget_items with budget_periods
+- To get actual vs budgeted: JOIN budget_items with actual_expenses
+- To filter by status: Use WHERE clause on status columns
+- Amounts are stored as DECIMAL(18,2) - use SUM() for aggregations
+- Use LIMIT instead of TOP for limiting results
+- Use MySQL date functions (DATE_FORMAT, etc.) instead of SQL Server functions
+"""
+
 
 class Database:
     """Database connection and query execution class."""
 
     def __init__(self):
         """Initialize database connection."""
-        self.connection_params = self._get_config()
+        self.connection_params = _cfg().as_dict()
         self.conn: Optional[pymysql.Connection] = None
-
-    def _get_config(self):
-        """Get database configuration from environment variables."""
-        host = os.getenv("MYSQL_HOST", "localhost")
-        port = int(os.getenv("MYSQL_PORT", "3306"))
-        database = os.getenv("MYSQL_DATABASE", "budget_db")
-        username = os.getenv("MYSQL_USERNAME", "root")
-        password = os.getenv("MYSQL_PASSWORD", "")
-        ssl_disabled = os.getenv("MYSQL_SSL_DISABLED", "False").lower() == "true"
-        return {
-            "host": host,
-            "port": port,
-            "database": database,
-            "user": username,
-            "password": password,
-            "autocommit": False,
-        }
+        # SQL text -> server-side prepared statement name, in LRU order
+        self._prepared: "OrderedDict[str, str]" = OrderedDict()
+        # SQL text run once without preparing, in LRU order
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
 
     def connect(self):
-        """Establish connection to MySQL Database."""
+        """Acquire a connection to MySQL Database from the shared pool."""
         try:
-            self.conn = pymysql.connect(**self.connection_params)
+            self.conn = _get_pool(self.connection_params).connection()
+            self._prepared.clear()
             return True
         except Error as e:
             raise ConnectionError(f"Failed to connect to database: {str(e)}")
 
     def disconnect(self):
-        """Close database connection."""
+        """Return database connection to the shared pool."""
         if self.conn:
+            self._deallocate_all()
             self.conn.close()
             self.conn = None
 
+    def _deallocate_all(self):
+        """Free this object's prepared statements before the session is reused."""
+        if not self._prepared:
+            return
+
+        try:
+            cursor = self.conn.cursor()
+            for name in self._prepared.values():
+                try:
+                    cursor.execute(f"DEALLOCATE PREPARE {name}")
+                except Error:
+                    # Already gone, e.g. the session was reconnected
+                    pass
+            cursor.close()
+        except Error:
+            # The connection is unusable; its statements died with the session
+            pass
+        self._prepared.clear()
+
+    def _prepare(self, cursor, query: str) -> Optional[str]:
+        """
+        Get the prepared statement name for a query, preparing it if needed.
+
+        Most agent queries are one-off, so a query is only prepared the second
+        time it is seen.
+
+        Args:
+            cursor: Cursor on the current connection
+            query: SQL query string without parameters
+
+        Returns:
+            Name of the server-side prepared statement, or None on first sighting
+        """
+        name = self._prepared.get(query)
+        if name is not None:
+            self._prepared.move_to_end(query)
+            return name
+
+        if query not in self._seen:
+            self._seen[query] = None
+            if len(self._seen) > _SEEN_CACHE_SIZE:
+                self._seen.popitem(last=False)
+            return None
+        del self._seen[query]
+
+        name = "s_" + hashlib.blake2b(query.encode(), digest_size=8).hexdigest()
+        cursor.execute(f"PREPARE {name} FROM %s", (query,))
+        self._prepared[query] = name
+
+        # Evict the least recently used statement once the cache is full
+        if len(self._prepared) > _PREPARED_CACHE_SIZE:
+            _, evicted = self._prepared.popitem(last=False)
+            cursor.execute(f"DEALLOCATE PREPARE {evicted}")
+        return name
+
+    def _execute(self, cursor, query: str, params: Optional[Dict[str, Any]]):
+        """
+        Execute a query on the cursor.
+
+        Parameterized queries use client-side interpolation; repeated queries
+        without parameters go through a server-side prepared statement so
+        MySQL can skip parsing on later executions.
+        """
+        if params:
+            cursor.execute(query, params)
+            return
+
+        query = query.strip().rstrip(";")
+        name = self._prepare(cursor, query)
+        if name is None:
+            cursor.execute(query)
+            return
+
+        try:
+            cursor.execute(f"EXECUTE {name}")
+        except Error as e:
+            # The session was reset (e.g. reconnect); run it directly this
+            # time and prepare it again on the next sighting. This relies on
+            # the pool treating 1243 as non-fatal (see _is_connection_lost),
+            # so it reaches us without a DBUtils retry on a new connection.
+            if e.args[0] != ER.UNKNOWN_STMT_HANDLER:
+                raise
+            self._prepared.clear()
+            self._seen[query] = None
+            cursor.execute(query)
+
+    def begin_read_only(self):
+        """Start a read-only transaction; end it with commit or rollback."""
+        if not self.conn:
+            self.connect()
+
+        try:
+            # SET TRANSACTION applies to the next transaction only; begin()
+            # also tells DBUtils not to fail over while it is open
+            cursor = self.conn.cursor()
+            cursor.execute("SET TRANSACTION READ ONLY")
+            cursor.close()
+            self.conn.begin()
+        except Error as e:
+            raise RuntimeError(f"Failed to start transaction: {str(e)}")
+
     def execute_query(
         self, query: str, params: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
@@ -72,10 +358,7 @@ class Database:
             cursor = self.conn.cursor(pymysql.cursors.DictCursor)
 
             # Execute query with or without parameters
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
+            self._execute(cursor, query, params)
 
             # Fetch all rows (already dictionaries with DictCursor)
             results = cursor.fetchall()
@@ -86,6 +369,92 @@ class Database:
         except Error as e:
             raise RuntimeError(f"Query execution failed: {str(e)}")
 
+    def execute_query_tuples(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_rows: Optional[int] = None,
+    ) -> Tuple[List[str], List[Tuple[Any, ...]], int]:
+        """
+        Execute a SELECT query and return column names and rows as tuples.
+
+        Rows are read through an unbuffered server-side cursor without building
+        a dictionary per row. Rows beyond max_rows are counted while the result
+        is drained but never kept in memory.
+
+        Args:
+            query: SQL query string
+            params: Optional dictionary of parameters for parameterized queries
+            max_rows: Optional maximum number of rows to return
+
+        Returns:
+            Tuple of (column names, row tuples in column order, total row count)
+        """
+        if not self.conn:
+            self.connect()
+
+        try:
+            cursor = self.conn.cursor(pymysql.cursors.SSCursor)
+            try:
+                self._execute(cursor, query, params)
+                columns = [d[0] for d in cursor.description or ()]
+
+                rows: List[Tuple[Any, ...]] = []
+                total_rows = 0
+                while True:
+                    batch = cursor.fetchmany(500)
+                    if not batch:
+                        break
+                    if max_rows is None:
+                        rows.extend(batch)
+                    elif len(rows) < max_rows:
+                        rows.extend(batch[: max_rows - len(rows)])
+                    total_rows += len(batch)
+            finally:
+                # Closing drains any unread rows so the connection can be reused
+                cursor.close()
+
+            return columns, rows, total_rows
+
+        except Error as e:
+            raise RuntimeError(f"Query execution failed: {str(e)}")
+
+    def execute_query_stream(
+        self, query: str, params: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Execute a SELECT query and yield rows as they arrive from the server.
+
+        Uses an unbuffered server-side cursor so large result sets are never
+        fully materialized in client memory.
+
+        Args:
+            query: SQL query string
+            params: Optional dictionary of parameters for parameterized queries
+
+        Yields:
+            Dictionaries representing rows
+        """
+        if not self.conn:
+            self.connect()
+
+        try:
+            cursor = self.conn.cursor(pymysql.cursors.SSDictCursor)
+            try:
+                self._execute(cursor, query, params)
+
+                while True:
+                    rows = cursor.fetchmany(500)
+                    if not rows:
+                        break
+                    yield from rows
+            finally:
+                # Closing drains any unread rows so the connection can be reused
+                cursor.close()
+
+        except Error as e:
+            raise RuntimeError(f"Query execution failed: {str(e)}")
+
     def execute_non_query(
         self, query: str, params: Optional[Dict[str, Any]] = None
     ) -> int:
@@ -121,12 +490,25 @@ class Database:
                 self.conn.rollback()
             raise RuntimeError(f"Query execution failed: {str(e)}")
 
-    def execute_script(self, script: str):
+    def execute_many(
+        self,
+        query: str,
+        rows: Sequence[Dict[str, Any]],
+        batch_size: int = 1000,
+    ) -> int:
         """
-        Execute a SQL script (multiple statements).
+        Execute a non-SELECT query for many parameter sets in batches.
+
+        PyMySQL rewrites INSERT ... VALUES statements into a single multi-row
+        INSERT per batch; batches keep each packet under max_allowed_packet.
 
         Args:
-            script: SQL script string containing multiple statements
+            query: SQL query string
+            rows: Sequence of parameter dictionaries, one per row
+            batch_size: Number of rows sent per executemany call
+
+        Returns:
+            Number of rows affected
         """
         if not self.conn:
             self.connect()
@@ -134,84 +516,62 @@ class Database:
         try:
             cursor = self.conn.cursor()
 
-            # Split script by semicolons and execute each statement
-            statements = [s.strip() for s in script.split(";") if s.strip()]
-
-            for statement in statements:
-                if statement:
-                    cursor.execute(statement)
+            total = 0
+            for i in range(0, len(rows), batch_size):
+                cursor.executemany(query, rows[i : i + batch_size])
+                total += cursor.rowcount
 
             self.conn.commit()
             cursor.close()
 
+            return total
+
         except Error as e:
             if self.conn:
                 self.conn.rollback()
-            raise RuntimeError(f"Script execution failed: {str(e)}")
+            raise RuntimeError(f"Query execution failed: {str(e)}")
 
-    def get_schema_info(self) -> str:
+    def execute_script(self, script: str):
         """
-        Get database schema information for NL to SQL conversion.
+        Execute a SQL script (multiple statements) in a single round-trip.
 
-        Returns:
-            String containing schema information
+        The script is sent on a connection with multi-statement support, which
+        is kept in its own pool so that regular query connections never accept
+        stacked statements.
+
+        Args:
+            script: SQL script string containing multiple statements
         """
-        schema_info = """
-Database Schema for Zero-Based Budgeting (MySQL):
+        params = dict(self.connection_params)
+        params["client_flag"] = params.get("client_flag", 0) | CLIENT.MULTI_STATEMENTS
+        conn = _get_pool(params).connection()
 
-Table: departments
-Columns:
-- id (INT, PRIMARY KEY): Unique identifier for department
-- name (VARCHAR): Department name
-- code (VARCHAR): Department code (unique)
-- created_at (TIMESTAMP): Creation timestamp (auto-set on insert)
+        try:
+            cursor = conn.cursor()
 
-Table: budget_periods
-Columns:
-- id (INT, PRIMARY KEY): Unique identifier for budget period
-- period_name (VARCHAR): Name of the period (e.g., "Q1 2024")
-- start_date (DATE): Period start date
-- end_date (DATE): Period end date
-- status (VARCHAR): Status (Draft, Approved, Closed)
-- created_at (TIMESTAMP): Creation timestamp (auto-set on insert)
+            # Send the whole script at once and consume every result set
+            cursor.execute(script)
+            while cursor.nextset():
+                pass
 
-Table: budget_categories
-Columns:
-- id (INT, PRIMARY KEY): Unique identifier for category
-- category_name (VARCHAR): Category name
-- description (VARCHAR): Category description
-- created_at (TIMESTAMP): Creation timestamp (auto-set on insert)
+            conn.commit()
+            cursor.close()
 
-Table: budget_items
-Columns:
-- id (INT, PRIMARY KEY): Unique identifier for budget item
-- department_id (INT, FOREIGN KEY -> departments.id): Department reference
-- period_id (INT, FOREIGN KEY -> budget_periods.id): Budget period reference
-- category_id (INT, FOREIGN KEY -> budget_categories.id): Category reference
-- budgeted_amount (DECIMAL): Budgeted amount
-- justification (VARCHAR): Justification for the budget item
-- status (VARCHAR): Status (Draft, Submitted, Approved, Rejected)
-- created_at (TIMESTAMP): Creation timestamp (auto-set on insert)
+        except Error as e:
+            conn.rollback()
+            raise RuntimeError(f"Script execution failed: {str(e)}")
+        finally:
+            conn.close()
 
-Table: actual_expenses
-Columns:
-- id (INT, PRIMARY KEY): Unique identifier for expense
-- budget_item_id (INT, FOREIGN KEY -> budget_items.id): Budget item reference
-- amount (DECIMAL): Expense amount
-- expense_date (DATE): Date of expense
-- description (VARCHAR): Expense description
-- created_at (TIMESTAMP): Creation timestamp (auto-set on insert)
+    @staticmethod
+    def get_schema_info() -> str:
+        """
+        Get database schema information for NL to SQL conversion.
 
-Common Query Patterns:
-- To get budget totals by department: JOIN budget_items with departments
-- To get budget by period: JOIN budget_items with budget_periods
-- To get actual vs budgeted: JOIN budget_items with actual_expenses
-- To filter by status: Use WHERE clause on status columns
-- Amounts are stored as DECIMAL(18,2) - use SUM() for aggregations
-- Use LIMIT instead of TOP for limiting results
-- Use MySQL date functions (DATE_FORMAT, etc.) instead of SQL Server functions
-"""
-        return schema_info
+        Returns:
+            String containing schema information
+        """
+        return _SCHEMA_INFO
 
     def __enter__(self):
         """Context manager entry."""
@@ -1,5 +1,141 @@
+import re
+import atexit
+import hashlib
+import threading
+import weakref
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 from src.database import Database
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Short-lived cache of query results keyed on normalized SQL text
+_RESULT_CACHE: TTLCache = TTLCache(maxsize=256, ttl=60)
+_RESULT_CACHE_LOCK = threading.Lock()
+
+# Only read queries (plain SELECT or CTE) are accepted, one statement at a time
+_SELECT_RE = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+_FORBID_RE = re.compile(r";\s*\S")
+# MySQL also accepts WITH ... UPDATE/DELETE, so CTEs must not contain writes;
+# INSERT()/REPLACE() string functions are followed by "(" and still allowed
+_CTE_RE = re.compile(r"^\s*with\b", re.IGNORECASE)
+_WRITE_RE = re.compile(r"\b(insert|update|delete|replace)\b(?!\s*\()", re.IGNORECASE)
+
+# Queries whose results depend on the current time/randomness are never cached
+_NON_DETERMINISTIC_RE = re.compile(
+    r"\b(now|curdate|curtime|sysdate|rand|uuid|utc_date|utc_time|utc_timestamp"
+    r"|unix_timestamp)\s*\(|\b(current_(date|time|timestamp)|localtime(stamp)?)\b",
+    re.IGNORECASE,
+)
+
+# Maximum number of rows handed back to the LLM per query
+_MAX_ROWS = 200
+
+# Shared worker threads for batches; each keeps its own Database via _db()
+_BATCH_MAX_WORKERS = 8
+_BATCH_EXECUTOR = ThreadPoolExecutor(
+    max_workers=_BATCH_MAX_WORKERS, thread_name_prefix="sql-batch"
+)
+
+# One lazily connected Database per thread, reused across tool calls
+_TL = threading.local()
+_THREAD_DBS: "weakref.WeakSet[Database]" = weakref.WeakSet()
+
+
+def _db() -> Database:
+    """Get the calling thread's Database, connecting it on first use."""
+    db = getattr(_TL, "db", None)
+    if db is None:
+        db = Database()
+        db.connect()
+        _TL.db = db
+        _THREAD_DBS.add(db)
+    return db
+
+
+@atexit.register
+def _disconnect_all():
+    """Return every thread's connection to the pool at interpreter exit."""
+    for db in list(_THREAD_DBS):
+        db.disconnect()
+
+
+def _cache_key(sql_query: str) -> bytes:
+    """Build a cache key from whitespace-normalized SQL text."""
+    # Case is kept: it matters inside string literals and aliases
+    normalized = " ".join(sql_query.split())
+    return hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+
+
+def _check_query(sql_query: str) -> Optional[Dict[str, Any]]:
+    """Return an error response if the query fails the security check."""
+    # Only allow a single SELECT (or WITH ... SELECT) query
+    if not _SELECT_RE.match(sql_query):
+        return {
+            "error": "Only SELECT queries are allowed. Security check failed.",
+            "sql_query": sql_query,
+        }
+    if _FORBID_RE.search(sql_query):
+        return {
+            "error": "Multiple statements are not allowed. Security check failed.",
+            "sql_query": sql_query,
+        }
+    if _CTE_RE.match(sql_query) and _WRITE_RE.search(sql_query):
+        return {
+            "error": "CTEs must end in a SELECT statement. Security check failed.",
+            "sql_query": sql_query,
+        }
+    return None
+
+
+def _lookup_cache(
+    sql_query: str,
+) -> Tuple[Optional[bytes], Optional[Dict[str, Any]]]:
+    """
+    Look up a query in the result cache.
+
+    Returns:
+        Tuple of (cache key or None if the query is not cacheable, cached response)
+    """
+    if _NON_DETERMINISTIC_RE.search(sql_query):
+        return None, None
+
+    key = _cache_key(sql_query)
+    with _RESULT_CACHE_LOCK:
+        cached = _RESULT_CACHE.get(key)
+    if cached is None:
+        return key, None
+
+    print(f"♻️ Returning cached results ({cached['row_count']} rows).\n")
+    return key, {**cached, "sql_query": sql_query, "cached": True}
+
+
+def _build_response(
+    sql_query: str,
+    key: Optional[bytes],
+    columns: List[str],
+    rows: List[Tuple[Any, ...]],
+    total_rows: int,
+) -> Dict[str, Any]:
+    """Serialize already capped query results, caching the response if allowed."""
+    print(f"✅ Query executed successfully, returned {total_rows} rows.\n")
+    print(rows)
+
+    # Serialize once here; columns/rows is much smaller than a dict per row
+    response = {
+        "success": True,
+        "results_json": orjson.dumps(
+            {"columns": columns, "rows": rows}, default=str
+        ).decode(),
+        "row_count": len(rows),
+        "sql_query": sql_query,
+    }
+    if total_rows > len(rows):
+        response["truncated_total"] = total_rows
+    if key is not None:
+        with _RESULT_CACHE_LOCK:
+            _RESULT_CACHE[key] = response
+    return response
 
 
 def execute_sql_function(sql_query: str) -> Dict[str, Any]:
@@ -16,27 +152,50 @@ def execute_sql_function(sql_query: str) -> Dict[str, Any]:
         # Print the SQL query being executed
         print(f"\n📝 Executing SQL Query:\n{sql_query}\n")
 
-        # Security check - only allow SELECT queries
-        sql_upper = sql_query.strip().upper()
-        if not sql_upper.startswith("SELECT"):
-            return {
-                "error": "Only SELECT queries are allowed. Security check failed.",
-                "sql_query": sql_query,
-            }
+        error = _check_query(sql_query)
+        if error:
+            return error
 
-        # Initialize database connection
-        db = Database()
+        # Serve repeat queries from the result cache
+        key, cached = _lookup_cache(sql_query)
+        if cached is not None:
+            return cached
 
-        # Execute the query
-        results = db.execute_query(sql_query)
-        print(f"✅ Query executed successfully, returned {len(results)} rows.\n")
-        print(results)
+        # Fetch plain row tuples over this thread's connection; the read-only
+        # transaction makes the server reject any write that slips through
+        db = _db()
+        db.begin_read_only()
+        try:
+            columns, rows, total_rows = db.execute_query_tuples(
+                sql_query, max_rows=_MAX_ROWS
+            )
+        finally:
+            # End the read transaction so the next call sees fresh data
+            db.conn.rollback()
 
-        return {
-            "success": True,
-            "results": results,
-            "row_count": len(results),
-            "sql_query": sql_query,
-        }
+        return _build_response(sql_query, key, columns, rows, total_rows)
     except Exception as e:
         return {"success": False, "error": str(e), "sql_query": sql_query}
+
+
+def execute_sql_batch(sql_queries: List[str]) -> Dict[str, Any]:
+    """
+    Execute several independent SQL SELECT queries concurrently against the Zero-Based Budgeting MySQL database. Use this function instead of multiple execute_sql_function calls when a question breaks down into independent queries (e.g. one per department or per period).
+
+    Args:
+        sql_queries (List[str]): The SQL SELECT queries to execute. Each must be a valid, self-contained SELECT statement for MySQL.
+
+    Returns:
+        Dict[str, Any]: Dictionary with one result entry per query, in the same order as sql_queries
+    """
+    if not sql_queries:
+        return {"success": False, "error": "No SQL queries provided."}
+
+    # Worker threads persist, so their connections are reused across batches
+    results = list(_BATCH_EXECUTOR.map(execute_sql_function, sql_queries))
+
+    return {
+        "success": all(r.get("success", False) for r in results),
+        "results": results,
+        "query_count": len(results),
+    }